@@ -5,6 +5,9 @@ load_dotenv()
 
 DOCKER_REGISTRY = "https://index.docker.io/v1/"
 
+# Clone with the git CLI instead of pygit2 (also used automatically when pygit2 isn't installed)
+GIT_CLONE_SUBPROCESS = os.getenv("GIT_CLONE_SUBPROCESS", "false").lower() == "true"
+
 SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key_here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
@@ -12,8 +15,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
 MONGODB_URI = os.getenv("MONGODB_URI")
 DB_NAME = os.getenv("DB_NAME")
 
+# Redis backs the shared rate-limit counters and the response cache (redis_deployment.yaml / redis_service.yaml).
+# Without it limits fall back to per-process memory and responses go uncached.
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+RATE_LIMIT_STORAGE_URI = os.getenv("RATE_LIMIT_STORAGE_URI", REDIS_URL)
+
 LOG_FILE = "DMS_V2.log"
 LOG_DIR = "logs"
 
+# Uvicorn worker processes (the uvicorn CLI reads the same variable)
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "4"))
+
 # USER_NAME = os.getenv("USER_NAME")
 # PASSWORD = os.getenv("PASSWORD")
\ No newline at end of file
@@ -1,6 +1,11 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener
+
+from concurrent_log_handler import ConcurrentRotatingFileHandler
 
 from config import LOG_DIR, LOG_FILE
 
@@ -8,26 +13,52 @@ LOG_DIR = LOG_DIR
 LOG_FILE = LOG_FILE
 os.makedirs(LOG_DIR, exist_ok=True)  # Create 'logs/' directory if not present
 
+# Formatter
+formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
+
+# Console Handler
+console_handler = logging.StreamHandler()
+console_handler.setFormatter(formatter)
+
+# File Handler with Rotation (5MB per file, keep 3 backups).
+# Every uvicorn worker writes the same file, so writes and rollovers are serialized through a lock file
+# instead of each process rotating the file under the others.
+file_handler = ConcurrentRotatingFileHandler(
+    os.path.join(LOG_DIR, LOG_FILE),
+    maxBytes=5*1024*1024,
+    backupCount=3
+)
+file_handler.setFormatter(formatter)
+
+# Buffer file writes; flushed when full, on ERROR and above, or every LOG_FLUSH_INTERVAL seconds
+LOG_FLUSH_INTERVAL = 30
+buffered_file_handler = MemoryHandler(
+    capacity=512,
+    flushLevel=logging.ERROR,
+    target=file_handler,
+    flushOnClose=True
+)
+
+def _flush_periodically(stop_event: threading.Event):
+    while not stop_event.wait(LOG_FLUSH_INTERVAL):
+        buffered_file_handler.flush()
+
+_stop_flushing = threading.Event()
+threading.Thread(target=_flush_periodically, args=(_stop_flushing,), name="log-flusher", daemon=True).start()
+atexit.register(buffered_file_handler.close)
+atexit.register(_stop_flushing.set)
+
+# Loggers only enqueue records; the listener thread does the console/file I/O
+log_queue = queue.Queue(-1)
+listener = QueueListener(log_queue, console_handler, buffered_file_handler, respect_handler_level=True)
+listener.start()
+atexit.register(listener.stop)
+
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
 
     if not logger.handlers:
-        # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
-
-        # Console Handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-
-        # File Handler with Rotation (5MB per file, keep 3 backups)
-        file_handler = RotatingFileHandler(
-            os.path.join(LOG_DIR, LOG_FILE),
-            maxBytes=5*1024*1024,
-            backupCount=3
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
@@ -1,23 +1,29 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from routes.container_route import container_router as con_router
 from routes.auth_route import auth_router
 from routes.image_route import image_router as img_router
 from routes.volume_route import volume_router as vol_router
 import uvicorn
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from services.db_service import init_db
-
-limiter = Limiter(key_func=get_remote_address)
+from services.docker_client import DOCKER_POOL_SIZE
+from config import WEB_CONCURRENCY
+from rate_limiter import limiter
 
 app = FastAPI(openapi_url="/app2/openapi.json",
     docs_url="/app2/docs",
     redoc_url="/app2/redoc",
     title="Docker Management API",
     description="APIs to manage Docker Images, Containers, and Volumes",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 app.state.limiter = limiter
@@ -29,12 +35,31 @@ app.include_router(con_router, prefix="/app2", tags=["Container Operations"])
 app.include_router(vol_router, prefix="/app2", tags=["Volume Operations"])
 
 @app.on_event("startup")
-def startup_db():
-    init_db()
+async def startup_executor():
+    # asyncio.to_thread runs Docker/Kubernetes calls here; size it to the Docker connection pool
+    # so concurrent requests aren't capped at the default min(32, cpu + 4) threads
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=DOCKER_POOL_SIZE, thread_name_prefix="docker-io")
+    )
+
+@app.on_event("startup")
+async def startup_db():
+    await init_db()
 
 @app.get("/app2/home")
 async def root():
     return {"message": "APP2 Home"}
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    if os.getenv("DEV"):
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=WEB_CONCURRENCY,
+            loop="uvloop",
+            http="httptools",
+            reload=False
+        )
@@ -0,0 +1,13 @@
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from config import RATE_LIMIT_STORAGE_URI
+
+# Shared by every worker through Redis; the moving-window check runs as a single Lua script,
+# and falls back to in-process counting if Redis is unreachable
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=RATE_LIMIT_STORAGE_URI,
+    strategy="moving-window",
+    in_memory_fallback_enabled=True
+)
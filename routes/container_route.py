@@ -1,160 +1,246 @@
+import asyncio
+import mmap
 import os
-import docker
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException, APIRouter, Depends, Request, Query
-from fastapi.responses import PlainTextResponse
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from rate_limiter import limiter
 
 from schemas.docker_schema import *
 
 from services import docker_service as ds
 from config import LOG_FILE, LOG_DIR
 from services.auth_service import role_required,get_current_user
+from services.cache_service import cache_policy
 
 from logger import get_logger
 logger = get_logger(__name__)
 
 
-docker_client = docker.from_env()
 container_router = APIRouter()
 
-limiter = Limiter(key_func=get_remote_address)
+LOG_TAIL_BYTES = 1_048_576  # /logs serves at most the last 1MB of the log file
+LOG_CHUNK_SIZE = 65_536
+
+def iter_file_tail(path: str, max_bytes: int):
+    # Serve the tail straight from the page cache through a read-only mapping.
+    # The file is opened and mapped here, not lazily, so errors surface before a response has started.
+    log_file = open(path, "rb")
+    try:
+        size = os.fstat(log_file.fileno()).st_size
+        mm = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+    except BaseException:
+        log_file.close()
+        raise
+    return _iter_mapped_chunks(log_file, mm, max(0, size - max_bytes))
+
+def _iter_mapped_chunks(log_file, mm, start: int):
+    try:
+        if mm is None:
+            return
+        for offset in range(start, len(mm), LOG_CHUNK_SIZE):
+            yield mm[offset:offset + LOG_CHUNK_SIZE]
+    finally:
+        if mm is not None:
+            mm.close()
+        log_file.close()
+
+LOG_DISCONNECT_POLL = 1.0  # seconds between client disconnect checks while a followed log is idle
+
+# An open log stream parks a thread in the blocking SDK read for as long as the container is quiet, so streams
+# get their own pool and are capped at its size instead of starving the shared Docker/hashing executor
+LOG_STREAM_LIMIT = 16
+_log_stream_executor = ThreadPoolExecutor(max_workers=LOG_STREAM_LIMIT, thread_name_prefix="log-stream")
+_open_log_streams = 0
+
+def _next_log_chunk(log_stream):
+    return asyncio.get_running_loop().run_in_executor(_log_stream_executor, next, log_stream, None)
+
+async def stream_container_logs(request: Request, log_stream):
+    # Pull chunks from the blocking SDK stream on the log executor, but stop as soon as the client goes away.
+    # Closing the stream shuts its socket, which also unblocks a read still waiting for the next line.
+    # The caller must have taken a slot in _open_log_streams; it is released here.
+    global _open_log_streams
+    next_chunk = _next_log_chunk(log_stream)
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_chunk}, timeout=LOG_DISCONNECT_POLL)
+            if not done:
+                if await request.is_disconnected():
+                    break
+                continue
+            chunk = next_chunk.result()
+            if chunk is None:
+                break
+            yield chunk
+            next_chunk = _next_log_chunk(log_stream)
+    finally:
+        close = getattr(log_stream, "close", None)
+        if close is not None:
+            close()
+        _open_log_streams -= 1
 
 @container_router.post("/container/run")
-def run_container(payload: ContainerRunRequest,
-                  current_user: dict = Depends(get_current_user)):
+async def run_container(payload: ContainerRunRequest,
+                        current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.run_container(payload.image_name, payload.container_name, payload.ports, payload.environment)
-        logger.info(f"container '{payload.container_name}' initiated successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.run_container, payload.image_name, payload.container_name, payload.ports, payload.environment)
+        logger.info("container '%s' initiated successfully by %s", payload.container_name, current_user['username'])
         return {
             "message": f"container '{payload.container_name}' initiated successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error running the container {payload.container_name}, {str(e)}")
+        logger.error("Error running the container %s, %s", payload.container_name, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.post("/pod/run")
-def run_pod(payload: RunPodRequest,
-                  current_user: dict = Depends(get_current_user)):
+async def run_pod(payload: RunPodRequest,
+                        current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.run_pod(payload.image_name, payload.container_name, payload.container_port)
-        logger.info(f"Pod '{result['pod_name']}' created by {current_user['username']}")
+        result = await asyncio.to_thread(ds.run_pod, payload.image_name, payload.container_name, payload.container_port)
+        logger.info("Pod '%s' created by %s", result['pod_name'], current_user['username'])
         return {
             "message": f"Pod '{result['pod_name']}' created successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error creating pod: {str(e)}")
+        logger.error("Error creating pod: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.post("/container/stop")
-def stop_container(payload: ContainerRunRequest,
-                   current_user: dict = Depends(get_current_user)):
+async def stop_container(payload: ContainerRunRequest,
+                         current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.stop_container(payload.container_name)
-        logger.info(f"container '{payload.container_name}' deleted successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.stop_container, payload.container_name)
+        logger.info("container '%s' deleted successfully by %s", payload.container_name, current_user['username'])
         return {
             "message": f"container '{payload.container_name}' deleted successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error stopping the container {payload.container_name}, {str(e)}")
+        logger.error("Error stopping the container %s, %s", payload.container_name, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.post("/container/start")
-def start_container(payload: ContainerRunRequest,
-                    current_user: dict = Depends(get_current_user)):
+async def start_container(payload: ContainerRunRequest,
+                          current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.start_container(payload.container_name)
-        logger.info(f"container '{payload.container_name}' deleted successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.start_container, payload.container_name)
+        logger.info("container '%s' deleted successfully by %s", payload.container_name, current_user['username'])
         return {
             "message": f"container '{payload.container_name}' deleted successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error starting the container {payload.container_name}, {str(e)}")
+        logger.error("Error starting the container %s, %s", payload.container_name, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.post("/container/restart")
-def restart_container(payload: ContainerRunRequest,
-                      current_user: dict = Depends(get_current_user)):
+async def restart_container(payload: ContainerRunRequest,
+                            current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.restart_container(payload.container_name)
-        logger.info(f"container '{payload.container_name}' deleted successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.restart_container, payload.container_name)
+        logger.info("container '%s' deleted successfully by %s", payload.container_name, current_user['username'])
         return {
             "message": f"container '{payload.container_name}' deleted successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error restarting container: {str(e)}")
+        logger.error("Error restarting container: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.post("/container/remove")
-def remove_container(payload: ContainerRunRequest,
-                     current_user: dict = Depends(role_required(["admin"]))):
+async def remove_container(payload: ContainerRunRequest,
+                           current_user: dict = Depends(role_required(["admin"]))):
     try:
-        result = ds.remove_container(payload.container_name)
-        logger.info(f"container '{payload.container_name}' deleted successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.remove_container, payload.container_name)
+        logger.info("container '%s' deleted successfully by %s", payload.container_name, current_user['username'])
         return {
             "message": f"container '{payload.container_name}' deleted successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error removing volume: {str(e)}")
+        logger.error("Error removing volume: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.get("/logs/{container_name}")
 @limiter.limit("5/minute")
-def get_logs(container_name: str,
-             request: Request,
-             current_user: dict = Depends(role_required(["admin", "user"]))):
-    logger.info(f"Container logs listed by {current_user['username']} on {container_name}")
+async def get_logs(container_name: str,
+                   request: Request,
+                   tail: int = Query(500, ge=1, le=10000, description="Number of lines from the end of the log"),
+                   since: int = Query(None, description="Only return logs since this Unix timestamp"),
+                   follow: bool = Query(False, description="Keep the stream open for new log lines"),
+                   current_user: dict = Depends(role_required(["admin", "user"]))):
+    global _open_log_streams
+    logger.info("Container logs listed by %s on %s", current_user['username'], container_name)
+    if _open_log_streams >= LOG_STREAM_LIMIT:
+        logger.warning("Log stream limit reached, rejecting %s on %s", current_user['username'], container_name)
+        raise HTTPException(status_code=503, detail="Too many open log streams, try again later")
+    _open_log_streams += 1
     try:
-        return ds.get_logs(container_name)
+        log_stream = await asyncio.to_thread(ds.get_logs, container_name, tail, since, follow)
+        return StreamingResponse(stream_container_logs(request, log_stream), media_type="text/plain")
     except Exception as e:
-        logger.error(f"Error getting logs for container {container_name}: {str(e)}")
+        _open_log_streams -= 1
+        logger.error("Error getting logs for container %s: %s", container_name, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.get("/logs/")
-def get_logs_with_pods(
+async def get_logs_with_pods(
     pod_name: str = Query(..., description="Kubernetes Pod Name"),
     container_name: str = Query(None, description="Container name inside the pod"),
     request: Request = None,
     current_user: dict = Depends(role_required(["admin", "user"]))
 ):
-    logger.info(f"Fetching logs for pod={pod_name}, container={container_name} by {current_user['username']}")
+    logger.info("Fetching logs for pod=%s, container=%s by %s", pod_name, container_name, current_user['username'])
     try:
-        return ds.get_logs_with_pods(pod_name, container_name)
+        return await asyncio.to_thread(ds.get_logs_with_pods, pod_name, container_name)
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.get("/ps")
-def docker_ps(current_user: dict = Depends(get_current_user)):
-    logger.info(f"Docker ps performed {current_user['username']}")
-    return ds.docker_ps()
+@cache_policy(ttl=15, tag=ds.LISTINGS_CACHE_TAG)
+async def docker_ps(request: Request,
+                    current_user: dict = Depends(get_current_user)):
+    logger.debug("Docker ps performed %s", current_user['username'])
+    return await asyncio.to_thread(ds.docker_ps)
+
+@container_router.get("/overview")
+async def gather_overview(current_user: dict = Depends(get_current_user)):
+    logger.debug("Docker overview requested by %s", current_user['username'])
+    try:
+        # The three listings are independent, so run them concurrently on the shared connection pool
+        images, containers, volumes = await asyncio.gather(
+            asyncio.to_thread(ds.list_images),
+            asyncio.to_thread(ds.docker_ps),
+            asyncio.to_thread(ds.list_volumes)
+        )
+        return {"images": images, "containers": containers, "volumes": volumes}
+    except Exception as e:
+        logger.error("Error building docker overview: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
 @container_router.get("/logs", response_class=PlainTextResponse)
-def read_logs(current_user: dict = Depends(get_current_user)):
+async def read_logs(current_user: dict = Depends(get_current_user)):
     log_path = os.path.join(LOG_DIR, LOG_FILE)
-    if not os.path.exists(log_path):
+    try:
+        log_tail = iter_file_tail(log_path, LOG_TAIL_BYTES)
+    except FileNotFoundError:
         logger.error("Log file not found")
         raise HTTPException(status_code=404, detail="Log file not found")
-
-    try:
-        with open(log_path, "r") as log_file:
-            log_content = log_file.read()
-            return log_content
     except Exception as e:
-        logger.error(f"Failed to read log file: {str(e)}")
+        logger.error("Failed to read log file: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to read log file: {str(e)}")
 
+    return StreamingResponse(log_tail, media_type="text/plain")
+
  #-----------------------------------------------------------------------------------------------
 
 @container_router.get("/protected")
-def protected_route(current_user: dict = Depends(get_current_user)):
-    logger.info({"message": f"Hello, {current_user['username']}! You are authenticated."})
+async def protected_route(current_user: dict = Depends(get_current_user)):
+    logger.info("Hello, %s! You are authenticated.", current_user['username'])
     return {"message": f"Hello, {current_user['username']}! You are authenticated."}
 
 #---------------------------------------------------------------------------------------------------------------
\ No newline at end of file
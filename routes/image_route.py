@@ -1,30 +1,28 @@
-import docker
+import asyncio
+
 from fastapi import HTTPException, APIRouter, Depends, Query, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from rate_limiter import limiter
 
 from schemas.docker_schema import *
 
 from services import docker_service as ds
 from services.docker_service import build_image_from_repo, push_image_to_ghcr, pull_image_from_ghcr
 from services.auth_service import get_current_user
+from services.cache_service import cache_policy
 
 from logger import get_logger
 logger = get_logger(__name__)
 
-client = docker.from_env()
 image_router = APIRouter()
 
-limiter = Limiter(key_func=get_remote_address)
-
 @image_router.post("/docker/build from github repo")
-def build_image(request: BuildRequest,
-                current_user: dict = Depends(get_current_user)):
+async def build_image(request: BuildRequest,
+                      current_user: dict = Depends(get_current_user)):
     github_url = request.github_url
     image_name = request.image_name
     repo_name = request.repo_name
-    result = build_image_from_repo(github_url, image_name, repo_name)
-    logger.info(f"image '{request.image_name}' build by {current_user['username']} from {request.github_url}")
+    result = await asyncio.to_thread(build_image_from_repo, github_url, image_name, repo_name)
+    logger.info("image '%s' build by %s from %s", request.image_name, current_user['username'], request.github_url)
     return {
         "message": f"image '{request.image_name}' build by {current_user['username']} from {request.github_url}",
         "result": result
@@ -32,99 +30,102 @@ def build_image(request: BuildRequest,
 
 
 @image_router.post("/docker/push to ghcr")
-def push_image(request: GHCRImageRequest, current_user: dict = Depends(get_current_user)):
+async def push_image(request: GHCRImageRequest, current_user: dict = Depends(get_current_user)):
     github_url = request.github_url
     repo_name = request.repo_name
     image_name = request.image_name
     token = request.token  # Assuming the token is sent in the request
 
     # Pass the token to the service function
-    result = push_image_to_ghcr(github_url, repo_name, image_name, token)
+    result = await asyncio.to_thread(push_image_to_ghcr, github_url, repo_name, image_name, token)
 
-    logger.info(f"image '{request.image_name}' pushed to GHCR by {current_user['username']}")
+    logger.info("image '%s' pushed to GHCR by %s", request.image_name, current_user['username'])
     return {
         "message": f"image '{request.image_name}' pushed to GHCR by {current_user['username']}",
         "result": result
     }
 
 @image_router.post("/docker/pull from ghcr")
-def pull_image(request: GHCRImageRequest,
-               current_user: dict = Depends(get_current_user)):
+async def pull_image(request: GHCRImageRequest,
+                     current_user: dict = Depends(get_current_user)):
     github_url = request.github_url
     repo_name = request.repo_name
     image_name = request.image_name
-    result = pull_image_from_ghcr(github_url, repo_name, image_name)
-    logger.info(f"image '{request.image_name}' pulled from GHCR by {current_user['username']}")
+    result = await asyncio.to_thread(pull_image_from_ghcr, github_url, repo_name, image_name)
+    logger.info("image '%s' pulled from GHCR by %s", request.image_name, current_user['username'])
     return {
         "message": f"image '{request.image_name}' pulled from GHCR by {current_user['username']}",
         "result": result
     }
 
 @image_router.post("/docker/build")
-def build_image(payload: BuildImagePayload,
-                current_user: dict = Depends(get_current_user)):
+async def build_image(payload: BuildImagePayload,
+                      current_user: dict = Depends(get_current_user)):
     try:
-        build_response = ds.build_image(
+        build_response = await asyncio.to_thread(
+            ds.build_image,
             dockerfile_path=payload.dockerfile_path,
             image_name=payload.image_name,
             dockerfile_name=payload.dockerfile_name
         )
         result = {"message": build_response}
-        logger.info(f"image '{payload.image_name}' build by {current_user['username']}")
+        logger.info("image '%s' build by %s", payload.image_name, current_user['username'])
         return {
             "message": f"image '{payload.image_name}' build by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error building the image {str(e)}")
+        logger.error("Error building the image %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @image_router.post("/docker/push")
-def push_image(payload: PushImagePayload,
-               current_user: dict = Depends(get_current_user)):
+async def push_image(payload: PushImagePayload,
+                     current_user: dict = Depends(get_current_user)):
     try:
-        push_response = ds.push_image(
+        push_response = await asyncio.to_thread(
+            ds.push_image,
             local_image_name=payload.local_image_name,
             repository_name=payload.repository_name,
             username=payload.username,
             password=payload.password
         )
         result = {"message": push_response}
-        logger.info(f"image '{payload.local_image_name}' pushed by {current_user['username']} to {payload.repository_name}")
+        logger.info("image '%s' pushed by %s to %s", payload.local_image_name, current_user['username'], payload.repository_name)
         return {
             "message": f"image '{payload.local_image_name}' pushed by {current_user['username']} to {payload.repository_name}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error pushing the image {str(e)}")
+        logger.error("Error pushing the image %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @image_router.post("/pull")
-def pull_image(payload: PullImagePayload,
-               current_user: dict = Depends(get_current_user)):
+async def pull_image(payload: PullImagePayload,
+                     current_user: dict = Depends(get_current_user)):
     try:
-        result = ds.pull_image(payload.image_name, payload.repository_name)
-        logger.info(f"image '{payload.image_name}' initiated successfully by {current_user['username']}")
+        result = await asyncio.to_thread(ds.pull_image, payload.image_name, payload.repository_name)
+        logger.info("image '%s' initiated successfully by %s", payload.image_name, current_user['username'])
         return {
             "message": f"image '{payload.image_name}' initiated successfully by {current_user['username']}",
             "result": result
         }
     except Exception as e:
-        logger.error(f"Error Pulling the image {str(e)}")
+        logger.error("Error Pulling the image %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @image_router.get("/images")
 @limiter.limit("5/minute")
-def list_all_images(request: Request,
-                    current_user: dict = Depends(get_current_user)):
-    logger.info(f"Images listed by {current_user['username']}")
-    return ds.list_images()
+@cache_policy(ttl=15, tag=ds.LISTINGS_CACHE_TAG)
+async def list_all_images(request: Request,
+                          current_user: dict = Depends(get_current_user)):
+    logger.debug("Images listed by %s", current_user['username'])
+    return await asyncio.to_thread(ds.list_images)
 
 @image_router.delete("/images")
-def remove_image(image_name: str = Query(...),
-                 current_user: dict = Depends(get_current_user)):
-    result = ds.delete_image(image_name)
-    logger.info(f"image '{image_name}' initiated successfully by {current_user['username']}")
+async def remove_image(image_name: str = Query(...),
+                       current_user: dict = Depends(get_current_user)):
+    result = await asyncio.to_thread(ds.delete_image, image_name)
+    logger.info("image '%s' initiated successfully by %s", image_name, current_user['username'])
     return {
                 "message": f"image '{image_name}' initiated successfully by {current_user['username']}",
                 "result": result
@@ -1,38 +1,41 @@
-import docker
-from fastapi import APIRouter, Depends, Query
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, Request
 
 from schemas.docker_schema import *
 
 from services import docker_service as ds
 from services.auth_service import get_current_user
+from services.cache_service import cache_policy
 
 from logger import get_logger
 logger = get_logger(__name__)
 
-client = docker.from_env()
 volume_router = APIRouter()
 
 
 @volume_router.post("/volume/create")
-def create_docker_volume(payload: VolumeSchema,
-                         current_user: dict = Depends(get_current_user)):
-    result = ds.create_volume(payload.volume_name)
-    logger.info(f"Volume '{payload.volume_name}' deleted successfully by {current_user['username']}")
+async def create_docker_volume(payload: VolumeSchema,
+                               current_user: dict = Depends(get_current_user)):
+    result = await asyncio.to_thread(ds.create_volume, payload.volume_name)
+    logger.info("Volume '%s' deleted successfully by %s", payload.volume_name, current_user['username'])
     return {
             "message": f"Volume '{payload.volume_name}' deleted successfully by {current_user['username']}",
             "result": result
         }
 
 @volume_router.get("/volumes")
-def list_docker_volumes(current_user: dict = Depends(get_current_user)):
-    logger.info(f"Volumes listed by {current_user['username']}")
-    return ds.list_volumes()
+@cache_policy(ttl=15, tag=ds.LISTINGS_CACHE_TAG)
+async def list_docker_volumes(request: Request,
+                              current_user: dict = Depends(get_current_user)):
+    logger.debug("Volumes listed by %s", current_user['username'])
+    return await asyncio.to_thread(ds.list_volumes)
 
 @volume_router.delete("/volume/delete")
-def delete_docker_volume(current_user: dict = Depends(get_current_user),
-                         volume_name: str = Query(...)):
-    result = ds.delete_volume(volume_name)
-    logger.info(f"Volume '{volume_name}' deleted successfully by {current_user['username']}")
+async def delete_docker_volume(current_user: dict = Depends(get_current_user),
+                               volume_name: str = Query(...)):
+    result = await asyncio.to_thread(ds.delete_volume, volume_name)
+    logger.info("Volume '%s' deleted successfully by %s", volume_name, current_user['username'])
     return {
         "message": f"Volume '{volume_name}' deleted successfully by {current_user['username']}",
         "result": result
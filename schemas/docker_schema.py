@@ -1,55 +1,63 @@
 import os
-from dotenv import load_dotenv
 
-from pydantic import BaseModel
-from typing import Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, Optional, Dict
 
-load_dotenv()
+NonEmptyStr = Annotated[str, Field(min_length=1, max_length=256)]
 
-class ImageSchema(BaseModel):
-    image_name: str
+# Env-backed defaults are read when a request model is built, not when this module is imported
+# (the .env file is loaded once, by config.py)
+def _env_default(name: str):
+    return Field(default_factory=lambda: os.getenv(name, ""))
 
-class BuildRequest(BaseModel):
-    github_url: str
-    image_name: str
-    repo_name: str
+class StrictSchema(BaseModel):
+    # Unknown fields are rejected instead of silently dropped, and request models are immutable
+    model_config = ConfigDict(extra="forbid", frozen=True)
 
-class GHCRImageRequest(BaseModel):
-    github_url: str
-    repo_name: str
-    image_name: str
-    token: str
+class ImageSchema(StrictSchema):
+    image_name: NonEmptyStr
 
-class ContainerSchema(BaseModel):
-    image_name: str
-    container_name: str
+class BuildRequest(StrictSchema):
+    github_url: NonEmptyStr
+    image_name: NonEmptyStr
+    repo_name: NonEmptyStr
 
-class DockerLoginSchema(BaseModel):
-    username: str = os.getenv("USER_NAME")
-    password: str = os.getenv("PASSWORD")
+class GHCRImageRequest(StrictSchema):
+    github_url: NonEmptyStr
+    repo_name: NonEmptyStr
+    image_name: NonEmptyStr
+    token: NonEmptyStr
 
-class DockerImageSchema(BaseModel):
-    image_name: str
-    repository_name: str = os.getenv("REPOSITORY_NAME") # Docker Hub repository name (e.g., username/repository)
+class ContainerSchema(StrictSchema):
+    image_name: NonEmptyStr
+    container_name: NonEmptyStr
 
-class BuildImagePayload(BaseModel):
-    image_name: str
+class DockerLoginSchema(StrictSchema):
+    username: str = _env_default("USER_NAME")
+    password: str = _env_default("PASSWORD")
+
+class DockerImageSchema(StrictSchema):
+    image_name: NonEmptyStr
+    repository_name: str = _env_default("REPOSITORY_NAME") # Docker Hub repository name (e.g., username/repository)
+
+class BuildImagePayload(StrictSchema):
+    image_name: NonEmptyStr
     dockerfile_path: str = "/app"
     dockerfile_name: str = "Dockerfile"
 
-class PushImagePayload(BaseModel):
-    local_image_name: str
-    repository_name: str = os.getenv("REPOSITORY_NAME")
-    username: str = os.getenv("USER_NAME")
-    password: str = os.getenv("PASSWORD")
+class PushImagePayload(StrictSchema):
+    local_image_name: NonEmptyStr
+    repository_name: str = _env_default("REPOSITORY_NAME")
+    username: str = _env_default("USER_NAME")
+    password: str = _env_default("PASSWORD")
 
-class PullImagePayload(BaseModel):
-    image_name: str
-    repository_name: str
+class PullImagePayload(StrictSchema):
+    image_name: NonEmptyStr
+    repository_name: NonEmptyStr
 
-class ContainerRunRequest(BaseModel):
-    image_name: str
-    container_name: str
+class ContainerRunRequest(StrictSchema):
+    image_name: NonEmptyStr
+    container_name: NonEmptyStr
     ports: Optional[Dict[str, str]] = None
     environment: Optional[Dict[str, str]] = None
     volume_name: Optional[str] = None
@@ -57,19 +65,19 @@ class ContainerRunRequest(BaseModel):
     # environment: Optional[Dict[str, str]] = None # Example: {"80": "8080"}
     # volumes: Optional[Dict[str, Dict[str, str]]] = None  # Example: {"/host": {"bind": "/container", "mode": "rw"}}
 
-class VolumeSchema(BaseModel):
-    volume_name: str
+class VolumeSchema(StrictSchema):
+    volume_name: NonEmptyStr
 
-class User(BaseModel):
-    username: str
-    password: str
+class User(StrictSchema):
+    username: NonEmptyStr
+    password: NonEmptyStr
     role: str = "user"
 
-class Token(BaseModel):
+class Token(StrictSchema):
     access_token: str
     token_type: str
 
-class RunPodRequest(BaseModel):
-    image_name: str
-    container_name: str
+class RunPodRequest(StrictSchema):
+    image_name: NonEmptyStr
+    container_name: NonEmptyStr
     container_port: int
\ No newline at end of file
@@ -1,10 +1,15 @@
+import asyncio
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
-from datetime import datetime, timedelta
+from datetime import timedelta
+from functools import lru_cache
+import time
 
-from services.db_service import get_user_by_username
+from services.db_service import get_user_by_username, update_password_hash
 from config import SECRET_KEY, ALGORITHM
 from logger import get_logger
 
@@ -12,11 +17,18 @@ from typing import List
 
 logger = get_logger(__name__)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use argon2; existing bcrypt hashes still verify and are re-hashed on the next login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=1
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/app2/token")
 
-def get_user(username: str):
-    user = get_user_by_username(username)
+async def get_user(username: str):
+    user = await get_user_by_username(username)
     if user:
         user_dict = {
             "id": str(user["_id"]),
@@ -24,9 +36,9 @@ def get_user(username: str):
             "hashed_password": user["hashed_password"],
             "role": user.get("role", "user")
         }
-        logger.info(f"User found: {username}, role: {user_dict['role']}")
+        logger.info("User found: %s, role: %s", username, user_dict['role'])
         return user_dict
-    logger.info(f"User not found: {username}")
+    logger.info("User not found: %s", username)
     return None
 
 def verify_password(plain_password, hashed_password):
@@ -41,30 +53,44 @@ def get_password_hash(password):
     logger.info("Password hashed successfully")
     return pwd_context.hash(password)
 
+def password_needs_rehash(hashed_password):
+    return pwd_context.identify(hashed_password) is not None and pwd_context.needs_update(hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
-    to_encode.update({"exp": expire})
+    to_encode["exp"] = int(time.time()) + int((expires_delta or timedelta(minutes=15)).total_seconds())
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     logger.info("Token created Successfully")
     return encoded_jwt
 
-def authenticate_user(username: str, password: str):
-    user = get_user(username)
-    if not user or not verify_password(password, user["hashed_password"]):
+# Decoded claims are cached per token so repeat requests skip signature verification;
+# expiry is re-checked on every hit because cached entries outlive the token
+@lru_cache(maxsize=4096)
+def decode_access_token(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+async def authenticate_user(username: str, password: str):
+    user = await get_user(username)
+    if not user or not await asyncio.to_thread(verify_password, password, user["hashed_password"]):
         logger.error("Password or user is Invalid")
         return False
-    logger.info(f"User {username} Authenticated")
+    if password_needs_rehash(user["hashed_password"]):
+        user["hashed_password"] = await asyncio.to_thread(get_password_hash, password)
+        await update_password_hash(username, user["hashed_password"])
+        logger.info("Password hash upgraded for user %s", username)
+    logger.info("User %s Authenticated", username)
     return user
 
 def get_user_role(user: dict) -> str:
     return user.get("role", "user")
 
 def role_required(allowed_roles: List[str]):
-    def check_role(current_user: dict = Depends(get_current_user)):
+    allowed = frozenset(allowed_roles)
+
+    async def check_role(current_user: dict = Depends(get_current_user)):
         user_role = get_user_role(current_user)
-        if user_role not in allowed_roles:
-            logger.error(f"User {current_user['username']} with role {user_role} tried to access endpoint requiring roles: {allowed_roles}")
+        if user_role not in allowed:
+            logger.error("User %s with role %s tried to access endpoint requiring roles: %s", current_user['username'], user_role, allowed_roles)
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have sufficient permissions to perform this action",
@@ -73,27 +99,30 @@ def role_required(allowed_roles: List[str]):
         return current_user
     return check_role
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
+        if payload.get("exp", 0) <= time.time():
+            logger.error("Token expired")
+            raise credentials_exception
         username: str = payload.get("sub")
         if username is None:
             logger.error("Username not found")
             raise credentials_exception
 
         role: str = payload.get("role", "user")
-    except JWTError:
-        logger.error(f"{credentials_exception}")
+    except InvalidTokenError:
+        logger.error("%s", credentials_exception)
         raise credentials_exception
 
-    user = get_user(username)
+    user = await get_user(username)
     if user is None:
-        logger.error(f"{credentials_exception}")
+        logger.error("%s", credentials_exception)
         raise credentials_exception
 
     if "role" not in user:
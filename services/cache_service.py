@@ -0,0 +1,126 @@
+import functools
+import hashlib
+import json
+import time
+
+import redis
+import redis.asyncio as aioredis
+from fastapi.encoders import jsonable_encoder
+from redis.exceptions import RedisError
+
+from config import REDIS_URL
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+redis_client = aioredis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+# Blocking client for invalidations issued by the service layer, which runs in worker threads
+sync_redis_client = redis.from_url(REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+# How long an entry is kept after it goes stale, so it can still be served if the backend fails
+STALE_WINDOW = 300
+
+# After a Redis failure the cache is bypassed for this long, rather than paying the timeout on every request
+CACHE_RETRY_INTERVAL = 30
+_cache_down_until = 0.0
+
+
+def _cache_available() -> bool:
+    return time.monotonic() >= _cache_down_until
+
+
+def _mark_cache_down(action: str, e: Exception):
+    global _cache_down_until
+    _cache_down_until = time.monotonic() + CACHE_RETRY_INTERVAL
+    logger.warning("Response cache %s failed, bypassing it for %ss: %s", action, CACHE_RETRY_INTERVAL, e)
+
+
+def _cache_key(path: str, query: str, role: str) -> str:
+    digest = hashlib.sha256(f"{path}||{query}||{role}".encode()).hexdigest()
+    return f"response_cache:{digest}"
+
+
+def _tag_key(tag: str) -> str:
+    return f"response_cache_tag:{tag}"
+
+
+async def _read_entry(key: str):
+    if not _cache_available():
+        return None
+    try:
+        entry = await redis_client.hgetall(key)
+    except RedisError as e:
+        _mark_cache_down("read", e)
+        return None
+    if not entry:
+        return None
+    return {
+        "body": json.loads(entry[b"body"]),
+        "generated_at": float(entry[b"generated_at"]),
+        "stale_after": float(entry[b"stale_after"])
+    }
+
+
+async def _write_entry(key: str, body, ttl: int, tag: str = None):
+    if not _cache_available():
+        return
+    now = time.time()
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "body": json.dumps(jsonable_encoder(body)),
+                "generated_at": now,
+                "stale_after": now + ttl
+            })
+            pipe.expire(key, ttl + STALE_WINDOW)
+            if tag:
+                pipe.sadd(_tag_key(tag), key)
+                pipe.expire(_tag_key(tag), ttl + STALE_WINDOW)
+            await pipe.execute()
+    except RedisError as e:
+        _mark_cache_down("write", e)
+
+
+# Drops every cached response written under `tag`, stale entries included. Blocking; call from a worker thread.
+# Skipped while the cache is bypassed: nothing is read back until the retry interval, which outlasts the entry ttls.
+def invalidate_tag(tag: str):
+    if not _cache_available():
+        return
+    try:
+        keys = sync_redis_client.smembers(_tag_key(tag))
+        sync_redis_client.delete(_tag_key(tag), *keys)
+    except RedisError as e:
+        _mark_cache_down("invalidation", e)
+
+
+# Caches a GET handler's result for `ttl` seconds, keyed by path, query and user role.
+# If the handler fails while a stale entry is still held, the stale entry is served instead.
+# {"error": ...} bodies are returned but never cached, so they can't replace the last good entry.
+# Entries written with a `tag` can be dropped together through invalidate_tag.
+# The decorated handler must take `request` and `current_user` parameters.
+def cache_policy(ttl: int = 10, tag: str = None):
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs["request"]
+            role = kwargs["current_user"].get("role", "user")
+            key = _cache_key(request.url.path, request.url.query, role)
+
+            entry = await _read_entry(key)
+            if entry and time.time() < entry["stale_after"]:
+                return entry["body"]
+
+            try:
+                body = await func(*args, **kwargs)
+            except Exception as e:
+                if entry:
+                    logger.warning("Serving stale response for %s: %s", request.url.path, e)
+                    return entry["body"]
+                raise
+
+            if isinstance(body, dict) and "error" in body:
+                return body
+            await _write_entry(key, body, ttl, tag)
+            return body
+        return wrapper
+    return decorator
@@ -1,5 +1,8 @@
 import os
-from pymongo import MongoClient
+import threading
+
+from cachetools import TTLCache
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.errors import ConnectionFailure
 from logger import get_logger
 from dotenv import load_dotenv
@@ -11,41 +14,82 @@ logger = get_logger(__name__)
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "docker_management")
 
-try:
-    client = MongoClient(MONGODB_URI)
-    client.admin.command('ping')
-    logger.info("Connected to MongoDB successfully")
-    db = client[DB_NAME]
-    users_collection = db["users"]
-    users_collection.create_index("username", unique=True)
+client = AsyncIOMotorClient(
+    MONGODB_URI,
+    maxPoolSize=200,
+    minPoolSize=10,
+    maxIdleTimeMS=300_000,
+    waitQueueTimeoutMS=10_000,
+    serverSelectionTimeoutMS=3_000
+)
+db = client[DB_NAME]
+users_collection = db["users"]
+
+# Short-lived per-process cache of user documents for the auth hot path
+_user_cache = TTLCache(maxsize=1024, ttl=30)
+_user_cache_lock = threading.Lock()
+
+# Only the fields the auth path reads are fetched from Mongo
+_USER_PROJECTION = {"_id": 1, "username": 1, "hashed_password": 1, "role": 1}
 
-except ConnectionFailure as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
-    raise
 
+def invalidate_cached_user(username: str):
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
 
-def init_db():
-    if "users" not in db.list_collection_names():
-        db.create_collection("users")
+
+async def init_db():
+    try:
+        await client.admin.command('ping')
+        logger.info("Connected to MongoDB successfully")
+    except ConnectionFailure as e:
+        logger.error("Failed to connect to MongoDB: %s", e)
+        raise
+
+    if "users" not in await db.list_collection_names():
+        await db.create_collection("users")
         logger.info("Users collection created successfully")
+    existing_indexes = {ix["name"] async for ix in users_collection.list_indexes()}
+    if "username_1" not in existing_indexes:
+        await users_collection.create_index("username", unique=True)
+        logger.info("Username index created successfully")
     logger.info("Database initialized successfully")
 
 
-def get_user_by_username(username: str):
-    user = users_collection.find_one({"username": username})
-    logger.info(f"User lookup for username: {username}")
+async def get_user_by_username(username: str):
+    with _user_cache_lock:
+        user = _user_cache.get(username)
+    if user is not None:
+        return user
+
+    user = await users_collection.find_one({"username": username}, _USER_PROJECTION)
+    logger.info("User lookup for username: %s", username)
+    if user is not None:
+        with _user_cache_lock:
+            _user_cache[username] = user
     return user
 
 
-def insert_user(username: str, hashed_password: str, role: str = "user"):
+async def insert_user(username: str, hashed_password: str, role: str = "user"):
     try:
-        user_id = users_collection.insert_one({
+        result = await users_collection.insert_one({
             "username": username,
             "hashed_password": hashed_password,
             "role": role
-        }).inserted_id
-        logger.info(f"User {username} registered successfully with ID: {user_id}, role: {role}")
+        })
+        user_id = result.inserted_id
+        invalidate_cached_user(username)
+        logger.info("User %s registered successfully with ID: %s, role: %s", username, user_id, role)
         return str(user_id)
     except Exception as e:
-        logger.error(f"Error inserting user: {e}")
-        raise
\ No newline at end of file
+        logger.error("Error inserting user: %s", e)
+        raise
+
+
+async def update_password_hash(username: str, hashed_password: str):
+    await users_collection.update_one(
+        {"username": username},
+        {"$set": {"hashed_password": hashed_password}}
+    )
+    invalidate_cached_user(username)
+    logger.info("Password hash updated for user %s", username)
\ No newline at end of file
@@ -0,0 +1,16 @@
+import atexit
+import functools
+
+# Keep-alive connections held open to dockerd; sized for concurrent requests across the threadpool
+DOCKER_POOL_SIZE = 32
+
+# Single Docker client shared by every route and service module. It (and the docker SDK import)
+# is created on first use, so importing the app doesn't pay for it or touch the Docker socket.
+# The low-level API for list calls that don't need SDK model objects is get_docker_client().api.
+@functools.cache
+def get_docker_client():
+    import docker
+
+    docker_client = docker.from_env(max_pool_size=DOCKER_POOL_SIZE)
+    atexit.register(docker_client.close)
+    return docker_client
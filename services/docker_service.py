@@ -1,77 +1,213 @@
 import os
+import secrets
+import shutil
 import subprocess
-from uuid import uuid4
+from functools import cache, partial
+from threading import RLock
 
-import docker
-from kubernetes import client, config
-from docker.errors import APIError
-from config import DOCKER_REGISTRY
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
 
-# Load cluster config
+from config import DOCKER_REGISTRY, GIT_CLONE_SUBPROCESS
+from services.cache_service import invalidate_tag
+from services.docker_client import get_docker_client
+
+# Load cluster config on first use; the kubernetes package is only imported by the pod endpoints
 # config.load_incluster_config()
 # v1 = client.CoreV1Api()
-v1 = None
-
-try:
-    if os.getenv("KUBERNETES_SERVICE_HOST"):
-        config.load_incluster_config()
-    else:
-        config.load_kube_config()
-    v1 = client.CoreV1Api()
-except Exception as e:
-    print(f"Kubernetes disabled: {e}")
+@cache
+def _get_core_v1():
+    from kubernetes import client, config
 
-docker_client = docker.from_env()
+    try:
+        if os.getenv("KUBERNETES_SERVICE_HOST"):
+            config.load_incluster_config()
+        else:
+            config.load_kube_config()
+        # One API client and urllib3 pool for the process, sized for concurrent log/pod requests
+        k8s_configuration = client.Configuration.get_default_copy()
+        k8s_configuration.connection_pool_maxsize = 64
+        return client.CoreV1Api(client.ApiClient(configuration=k8s_configuration))
+    except Exception as e:
+        print(f"Kubernetes disabled: {e}")
+        return None
+
+# Every pod gets the same docker.sock hostPath; build the models once instead of per request
+@cache
+def _docker_sock_volume():
+    from kubernetes import client
+
+    volume = client.V1Volume(
+        name="docker-sock",
+        host_path=client.V1HostPathVolumeSource(
+            path="/var/run/docker.sock",
+            type="Socket"
+        )
+    )
+    mount = client.V1VolumeMount(
+        name="docker-sock",
+        mount_path="/var/run/docker.sock"
+    )
+    return volume, mount
+
+# Dashboards poll the three listing calls back to back; collapse repeats within 2s into one daemon call.
+# Anything that changes images, containers or volumes clears the cache, and the cached HTTP responses
+# built from these listings (tagged LISTINGS_CACHE_TAG) with it.
+LISTINGS_CACHE_TAG = "docker_listings"
+_listing_cache = TTLCache(maxsize=16, ttl=2)
+_listing_lock = RLock()
+
+def _invalidate_listings():
+    with _listing_lock:
+        _listing_cache.clear()
+    invalidate_tag(LISTINGS_CACHE_TAG)
+
+# Registry credentials that already passed a login, keyed by registry host ("docker.io", "ghcr.io").
+# Repeat pushes with the same credentials skip the login round-trip; they are only ever sent as
+# auth_config to the registry they were logged in to, and never used for pulls.
+_AUTH_CACHE: dict[str, dict] = {}
+_auth_lock = RLock()
+
+def _registry_auth(registry: str, username: str, password: str):
+    from docker.auth import resolve_index_name
+
+    key = resolve_index_name(registry)
+    auth_config = {"username": username, "password": password}
+    with _auth_lock:
+        if _AUTH_CACHE.get(key) == auth_config:
+            return
+    get_docker_client().login(username=username, password=password, registry=registry)
+    with _auth_lock:
+        _AUTH_CACHE[key] = auth_config
+
+def _push_auth(image_name: str):
+    # Cached credentials for the registry the image reference points at; None leaves it to the SDK
+    from docker.auth import resolve_repository_name
+
+    registry, _ = resolve_repository_name(image_name)
+    with _auth_lock:
+        return _AUTH_CACHE.get(registry)
+
+def _forget_auth(image_name: str):
+    from docker.auth import resolve_repository_name
+
+    registry, _ = resolve_repository_name(image_name)
+    with _auth_lock:
+        _AUTH_CACHE.pop(registry, None)
+
+def _is_unauthorized(error) -> bool:
+    message = str(error).lower()
+    return "unauthorized" in message or "401" in message
 
 def docker_login(username: str, password: str):
+    from docker.errors import APIError
+
     try:
-        login_response = docker_client.login(username=username, password=password, registry=DOCKER_REGISTRY)
+        from docker.auth import resolve_index_name
+
+        with _auth_lock:
+            _AUTH_CACHE.pop(resolve_index_name(DOCKER_REGISTRY), None)
+        _registry_auth(DOCKER_REGISTRY, username, password)
         return {"status": "success", "message": "Logged in to Docker Hub"}
     except APIError as e:
         return {"error": str(e)}
 
+# Excluded from the build context when the directory has no .dockerignore of its own
+DEFAULT_BUILD_EXCLUDES = [".git", "**/__pycache__", "node_modules", "*.pyc"]
+
+def _build_context_excludes(context_path: str) -> list:
+    try:
+        with open(os.path.join(context_path, ".dockerignore")) as f:
+            lines = [line.strip() for line in f.read().splitlines()]
+    except FileNotFoundError:
+        return DEFAULT_BUILD_EXCLUDES
+    return [line for line in lines if line and not line.startswith("#")]
+
 def build_image(dockerfile_path: str, image_name: str, dockerfile_name: str = "Dockerfile"):
     try:
-        image, logs = docker_client.images.build(
-            path=dockerfile_path,
-            tag=image_name,
-            dockerfile=dockerfile_name,
-            rm=True
+        from docker.utils import tar
+
+        # Tar the context ourselves so freshly cloned repos don't upload .git and friends to dockerd
+        context = tar(
+            dockerfile_path,
+            exclude=_build_context_excludes(dockerfile_path),
+            dockerfile=(dockerfile_name, None)
         )
-        log_output = ""
+        try:
+            image, logs = get_docker_client().images.build(
+                fileobj=context,
+                custom_context=True,
+                tag=image_name,
+                dockerfile=dockerfile_name,
+                rm=True
+            )
+        finally:
+            context.close()
+        _invalidate_listings()
+        parts = []
         for chunk in logs:
-            if 'stream' in chunk:
-                log_output += chunk['stream']
+            stream = chunk.get('stream')
+            if stream:
+                parts.append(stream)
+        log_output = "".join(parts)
         return f"Image '{image_name}' built successfully.\nLogs:\n{log_output}"
     except Exception as e:
         raise Exception(f"Build failed: {e}")
 #--------------------------------------------------------------------------------------------------------------------
+# Output is kept as bytes and only the last 4KB is decoded, which is all callers surface
+RUN_OUTPUT_TAIL_BYTES = 4096
+
 def run_command(command: list):
     try:
-        result = subprocess.run(command, capture_output=True, text=True, check=True)
-        return {"output": result.stdout.strip()}
+        result = subprocess.run(command, capture_output=True, check=True)
+        return {"output": result.stdout[-RUN_OUTPUT_TAIL_BYTES:].decode("utf-8", "replace").strip()}
     except subprocess.CalledProcessError as e:
-        return {"error": e.stderr.strip()}
+        return {"error": e.stderr[-RUN_OUTPUT_TAIL_BYTES:].decode("utf-8", "replace").strip()}
+
+# pygit2 is optional and only the clone path needs it, so it's imported on first clone
+@cache
+def _load_pygit2():
+    try:
+        import pygit2
+    except ImportError:
+        return None
+    return pygit2
 
 # Clone the GitHub repository to the home directory
 def clone_github_repo(github_url: str, repo_name: str, destination_dir: str = "/home/ubuntu"):
     try:
         # Ensure the destination directory exists
-        if not os.path.exists(destination_dir):
-            os.makedirs(destination_dir)
+        os.makedirs(destination_dir, exist_ok=True)
 
         # Use the provided repo_name
         destination_path = os.path.join(destination_dir, repo_name)
 
-        # Clone the GitHub repository to the specified path
-        if os.path.exists(destination_path):  # Check if directory already exists
+        # Creating the checkout directory doubles as the "already exists" check; git clones into it while empty
+        try:
+            os.mkdir(destination_path)
+        except FileExistsError:
             return {"error": f"Directory {destination_path} already exists."}
+    except OSError as e:
+        return {"error": f"Failed to clone repository: {e}"}
 
-        clone_command = ["git", "clone", github_url, destination_path]
-        result = subprocess.run(clone_command, capture_output=True, text=True, check=True)
-        return {"message": f"Repository cloned to {destination_path}", "output": result.stdout.strip()}
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Failed to clone repository: {e.stderr.strip()}"}
+    try:
+        # Only the tip tree is needed to build an image, so skip the history
+        pygit2 = None if GIT_CLONE_SUBPROCESS else _load_pygit2()
+        if pygit2 is not None:
+            pygit2.clone_repository(github_url, destination_path, depth=1)
+            return {"message": f"Repository cloned to {destination_path}", "output": ""}
+
+        clone_response = run_command([
+            "git", "clone", "--depth=1", "--single-branch", "--no-tags", github_url, destination_path
+        ])
+        if "error" in clone_response:
+            shutil.rmtree(destination_path, ignore_errors=True)
+            return {"error": f"Failed to clone repository: {clone_response['error']}"}
+        return {"message": f"Repository cloned to {destination_path}", "output": clone_response["output"]}
+    except Exception as e:
+        # Don't leave a half-cloned directory behind to block the next attempt
+        shutil.rmtree(destination_path, ignore_errors=True)
+        return {"error": f"Failed to clone repository: {e}"}
 
 # Build a Docker image from the cloned repository
 def build_image_from_repo(github_url: str, image_name: str, repo_name: str):
@@ -84,120 +220,144 @@ def build_image_from_repo(github_url: str, image_name: str, repo_name: str):
         # Assuming the repository contains a Dockerfile at the root level
         destination_dir = os.path.join("/home/ubuntu", repo_name)  # Path where the repo is cloned
 
-        # Build the Docker image
-        build_command = ["docker", "build", "-t", image_name, destination_dir]
- 
-        # Run the build command
-        build_response = run_command(build_command)
-        return build_response
+        # Build the Docker image over the shared daemon connection
+        return {"output": build_image(destination_dir, image_name)}
     except Exception as e:
         return {"error": str(e)}
 
 # Push a Docker image to GHCR
 def push_image_to_ghcr(github_url: str, repo_name: str, image_name: str, token: str):
+    from docker.errors import APIError
+
     try:
-        # Log in to GitHub Container Registry
-        login_command = [
-            "docker", "login", "ghcr.io", "-u", "moganth", "--password-stdin"
-        ]
-        # Pass the token securely
-        subprocess.run(login_command, input=token, text=True, check=True)
-
-        # Push the image to GHCR
-        push_command = ["docker", "push", image_name]
-        push_response = run_command(push_command)
-        return push_response
-    except subprocess.CalledProcessError as e:
-        return {"error": f"Failed to push image: {e.stderr.strip()}"}
+        # Log in to GitHub Container Registry (skipped when this token is already cached)
+        _registry_auth("ghcr.io", "moganth", token)
+
+        # Push the image to GHCR; failures are reported inside the progress stream
+        statuses = []
+        for line in get_docker_client().images.push(image_name, auth_config=_push_auth(image_name), stream=True, decode=True):
+            if "error" in line:
+                if _is_unauthorized(line["error"]):
+                    _forget_auth(image_name)
+                return {"error": f"Failed to push image: {line['error']}"}
+            if "status" in line and not line.get("progressDetail"):
+                statuses.append(line["status"])
+        return {"output": "\n".join(statuses)}
+    except APIError as e:
+        if _is_unauthorized(e):
+            _forget_auth(image_name)
+        return {"error": f"Failed to push image: {e}"}
 
 
 # Pull a Docker image from GHCR
 def pull_image_from_ghcr(github_url: str, repo_name: str, image_name: str):
     try:
-        pull_command = ["docker", "pull", image_name]
-        pull_response = run_command(pull_command)
-        return pull_response
+        image = get_docker_client().images.pull(image_name)
+        _invalidate_listings()
+        return {"output": f"Image '{image_name}' pulled successfully", "tags": image.tags}
     except Exception as e:
         return {"error": str(e)}
 #--------------------------------------------------------------------------------------------------------------------
 
 def push_image(local_image_name: str, repository_name: str, username: str, password: str):
     try:
-        # Login to Docker Hub
-        docker_client.login(username=username, password=password)
+        # Login to Docker Hub (skipped when these credentials are already cached)
+        _registry_auth(DOCKER_REGISTRY, username, password)
 
         # Tag the local image with the Docker Hub repository name
+        docker_client = get_docker_client()
         image = docker_client.images.get(local_image_name)
         image.tag(repository_name)
+        _invalidate_listings()
 
         # Push the image to Docker Hub
-        response = docker_client.images.push(repository_name)
+        parts = []
+        for line in docker_client.images.push(repository_name, auth_config=_push_auth(repository_name), stream=True, decode=True):
+            if "error" in line:
+                if _is_unauthorized(line["error"]):
+                    _forget_auth(repository_name)
+                raise Exception(line["error"])
+            if "status" in line and not line.get("progressDetail"):
+                parts.append(line["status"])
+        response = "\n".join(parts)
         return f"Image '{local_image_name}' pushed as '{repository_name}' to Docker Hub.\nResponse:\n{response}"
     except Exception as e:
         raise Exception(f"Push failed: {e}")
 
 def pull_image(image_name: str, repository_name: str):
+    from docker.errors import APIError
+
     try:
         full_image_name = f"{repository_name}:{image_name.split(':')[-1]}"
-        image = docker_client.images.pull(full_image_name)
+        get_docker_client().images.pull(full_image_name)
+        _invalidate_listings()
         return {"status": "success", "message": f"Image '{full_image_name}' pulled successfully"}
     except APIError as e:
         return {"error": str(e)}
 
+@cached(_listing_cache, key=partial(hashkey, "list_images"), lock=_listing_lock)
 def list_images():
-    images = docker_client.images.list()
+    images = get_docker_client().api.images()
     image_list = []
     for img in images:
+        image_id = img["Id"]
         image_list.append({
-            "id": img.id,
-            "tags": img.tags,
-            "short_id": img.short_id
+            "id": image_id,
+            "tags": [tag for tag in img.get("RepoTags") or [] if tag != "<none>:<none>"],
+            "short_id": image_id[:19] if image_id.startswith("sha256:") else image_id[:12]
         })
     return image_list
 
 def delete_image(image_name: str):
+    from docker.errors import APIError, ImageNotFound
+
     try:
-        docker_client.images.get(image_name)
-        docker_client.images.remove(image_name, force=True)
+        # remove_image reports a missing image itself, so no separate existence check is needed
+        get_docker_client().api.remove_image(image_name, force=True)
+        _invalidate_listings()
         return {"status": "success", "message": f"Image {image_name} removed"}
-    except docker.errors.ImageNotFound:
+    except ImageNotFound:
         return {"error": f"Image {image_name} not found"}
     except APIError as e:
         return {"error": str(e)}
 
-def get_logs(container_name: str):
+def get_logs(container_name: str, tail: int = 500, since: int = None, follow: bool = False):
     try:
-        container = docker_client.containers.get(container_name)
-        logs = container.logs(timestamps=True).decode('utf-8')
-        log_lines = logs.strip().split('\n')
-        return {"container": container_name, "logs": log_lines}
+        container = get_docker_client().containers.get(container_name)
+        # Generator of raw log chunks; nothing is buffered until the caller iterates it
+        return container.logs(stream=True, follow=follow, timestamps=True, tail=tail, since=since)
     except Exception as e:
         raise Exception(f"Failed to get logs for container '{container_name}': {e}")
 
+# Repeated polls of the same pod within a second are answered without hitting kube-apiserver
+@cached(TTLCache(maxsize=256, ttl=1.0), lock=RLock())
 def get_logs_with_pods(pod_name: str, container_name: str = None, namespace: str = "default"):
+    from kubernetes.client.exceptions import ApiException
+
     try:
-        logs = v1.read_namespaced_pod_log(
+        logs = _get_core_v1().read_namespaced_pod_log(
             name=pod_name,
             namespace=namespace,
             container=container_name,
             timestamps=True,
         )
         return {"pod": pod_name, "logs": logs.strip().split("\n")}
-    except client.exceptions.ApiException as e:
+    except ApiException as e:
         raise Exception(f"Kubernetes API error: {e.reason}")
     except Exception as e:
         raise Exception(f"Unexpected error: {str(e)}")
 
+@cached(_listing_cache, key=partial(hashkey, "docker_ps"), lock=_listing_lock)
 def docker_ps():
     try:
-        containers = docker_client.containers.list()
+        containers = get_docker_client().api.containers()
         result = []
         for container in containers:
             result.append({
-                "id": container.id,
-                "name": container.name,
-                "status": container.status,
-                "image": container.image.tags
+                "id": container["Id"],
+                "name": container["Names"][0].lstrip("/"),
+                "status": container["State"],
+                "image": [container["Image"]]
             })
         return result
     except Exception as e:
@@ -205,7 +365,7 @@ def docker_ps():
 
 def run_container(image_name: str, container_name: str, ports: dict = None, environment: dict = None, volumes: dict = None):
     try:
-        container = docker_client.containers.run(
+        container = get_docker_client().containers.run(
             image_name,
             name=container_name,
             ports=ports,
@@ -213,33 +373,25 @@ def run_container(image_name: str, container_name: str, ports: dict = None, envi
             volumes=volumes,  # Format: {"/host/path": {"bind": "/container/path", "mode": "rw"}}
             detach=True
         )
+        _invalidate_listings()
         return {"status": "success", "message": f"Container '{container_name}' started successfully", "container_id": container.id}
     except Exception as e:
         return {"error": str(e)}
 
 
 def run_pod(image_name: str, container_name: str, container_port: int, namespace: str = "default"):
-    try:
-        pod_name = f"{container_name}-{str(uuid4())[:8]}"
-
-        docker_sock_volume = client.V1Volume(
-            name="docker-sock",
-            host_path=client.V1HostPathVolumeSource(
-                path="/var/run/docker.sock",
-                type="Socket"
-            )
-        )
+    from kubernetes import client
+    from kubernetes.client.exceptions import ApiException
 
-        docker_sock_volume_mount = client.V1VolumeMount(
-            name = "docker-sock",
-            mount_path = "/var/run/docker.sock"
-        )
+    try:
+        pod_name = f"{container_name}-{secrets.token_hex(4)}"
+        docker_sock_volume, docker_sock_mount = _docker_sock_volume()
 
         container = client.V1Container(
             name = container_name,
             image = image_name,
             ports = [client.V1ContainerPort(container_port=container_port)],
-            volume_mounts=[docker_sock_volume_mount]
+            volume_mounts=[docker_sock_mount]
         )
 
         pod_spec = client.V1PodSpec(
@@ -267,13 +419,13 @@ def run_pod(image_name: str, container_name: str, container_port: int, namespace
         #     )
         # )
 
-        v1.create_namespaced_pod(namespace=namespace, body=pod_manifest)
+        _get_core_v1().create_namespaced_pod(namespace=namespace, body=pod_manifest)
         return {
             "status": "success",
             "message": f"Pod '{pod_name}' created successfully using image '{image_name}'",
             "pod_name": pod_name
         }
-    except client.exceptions.ApiException as e:
+    except ApiException as e:
         raise Exception(f"Kubernetes API error: {e.reason}")
     except Exception as e:
         raise Exception(f"Unexpected error: {str(e)}")
@@ -281,54 +433,61 @@ def run_pod(image_name: str, container_name: str, container_port: int, namespace
 
 def stop_container(container_name: str):
     try:
-        container = docker_client.containers.get(container_name)
+        container = get_docker_client().containers.get(container_name)
         container.stop()
+        _invalidate_listings()
         return {"status": "success", "message": f"Container '{container_name}' stopped"}
     except Exception as e:
         return {"error": str(e)}
 
 def start_container(container_name: str):
     try:
-        container = docker_client.containers.get(container_name)
+        container = get_docker_client().containers.get(container_name)
         container.start()
+        _invalidate_listings()
         return {"status": "success", "message": f"Container '{container_name}' started"}
     except Exception as e:
         return {"error": str(e)}
 
 def restart_container(container_name: str):
     try:
-        container = docker_client.containers.get(container_name)
+        container = get_docker_client().containers.get(container_name)
         container.restart()
+        _invalidate_listings()
         return {"status": "success", "message": f"Container '{container_name}' restarted"}
     except Exception as e:
         return {"error": str(e)}
 
 def remove_container(container_name: str):
     try:
-        container = docker_client.containers.get(container_name)
+        container = get_docker_client().containers.get(container_name)
         container.remove()
+        _invalidate_listings()
         return {"status": "success", "message": f"Container '{container_name}' removed"}
     except Exception as e:
         return {"error": str(e)}
 
 def create_volume(volume_name: str):
     try:
-        volume = docker_client.volumes.create(name=volume_name)
+        volume = get_docker_client().volumes.create(name=volume_name)
+        _invalidate_listings()
         return {"status": "success", "message": f"Volume '{volume_name}' created", "volume_id": volume.id}
     except Exception as e:
         return {"error": str(e)}
 
+@cached(_listing_cache, key=partial(hashkey, "list_volumes"), lock=_listing_lock)
 def list_volumes():
     try:
-        volumes = docker_client.volumes.list()
+        volumes = get_docker_client().volumes.list()
         return [{"name": v.name, "driver": v.attrs.get("Driver")} for v in volumes]
     except Exception as e:
-        return {"error": str(e)}
+        raise Exception(f"Failed to list volumes: {e}")
 
 def delete_volume(volume_name: str):
     try:
-        volume = docker_client.volumes.get(volume_name)
+        volume = get_docker_client().volumes.get(volume_name)
         volume.remove()
+        _invalidate_listings()
         return {"status": "success", "message": f"Volume '{volume_name}' deleted"}
     except Exception as e:
         return {"error": str(e)}
\ No newline at end of file
@@ -4,9 +4,10 @@ This file contains test cases for database connection, authentication, and core
 """
 
 import pytest
+import asyncio
 import os
 import uuid
-from unittest.mock import patch, MagicMock, Mock
+from unittest.mock import patch, MagicMock, AsyncMock
 from pymongo.errors import ConnectionFailure
 from fastapi.testclient import TestClient
 from datetime import timedelta
@@ -15,11 +16,13 @@ from datetime import timedelta
 from main import app
 
 # Import services and modules to test
-from services.db_service import init_db, get_user_by_username, insert_user
+from services import db_service
+from services.db_service import get_user_by_username, insert_user
 from services.auth_service import (
     verify_password,
     get_password_hash,
     create_access_token,
+    decode_access_token,
     authenticate_user,
     get_user_role
 )
@@ -31,8 +34,24 @@ from config import (
     DB_NAME
 )
 
-# Create test client
-client = TestClient(app)
+# One test client per session (per worker under pytest-xdist)
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+# Docker service writes invalidate the Redis response cache; keep unit tests off the real Redis host
+@pytest.fixture(autouse=True)
+def no_response_cache_invalidation():
+    with patch('services.docker_service.invalidate_tag') as mock_invalidate:
+        yield mock_invalidate
+
+# Tests seed the process-wide user cache with mocked documents; drop them so other tests hit their own mocks
+@pytest.fixture(autouse=True)
+def clear_user_cache():
+    yield
+    with db_service._user_cache_lock:
+        db_service._user_cache.clear()
 
 
 # ============================================
@@ -68,7 +87,7 @@ class TestConfiguration:
 class TestDatabaseConnection:
     """Test database connectivity and operations"""
     
-    @patch('services.db_service.MongoClient')
+    @patch('services.db_service.AsyncIOMotorClient')
     def test_mongodb_connection_success(self, mock_mongo_client):
         """Test successful MongoDB connection"""
         # Mock the MongoDB client
@@ -80,7 +99,7 @@ class TestDatabaseConnection:
         mock_client.admin.command('ping')
         mock_client.admin.command.assert_called_with('ping')
     
-    @patch('services.db_service.MongoClient')
+    @patch('services.db_service.AsyncIOMotorClient')
     def test_mongodb_connection_failure(self, mock_mongo_client):
         """Test MongoDB connection failure handling"""
         # Mock connection failure
@@ -99,18 +118,33 @@ class TestDatabaseConnection:
             "hashed_password": "hashed_pwd",
             "role": "user"
         }
-        mock_collection.find_one.return_value = mock_user
+        mock_collection.find_one = AsyncMock(return_value=mock_user)
         
-        result = get_user_by_username("testuser")
+        result = asyncio.run(get_user_by_username("testuser"))
         assert result is not None
-        mock_collection.find_one.assert_called_with({"username": "testuser"})
+        mock_collection.find_one.assert_called_with(
+            {"username": "testuser"},
+            {"_id": 1, "username": 1, "hashed_password": 1, "role": 1}
+        )
+    
+    @patch('services.db_service.users_collection')
+    def test_get_user_by_username_cached(self, mock_collection):
+        """Test repeated lookups are served from the user cache"""
+        from services.db_service import invalidate_cached_user
+        invalidate_cached_user("cacheduser")
+        mock_collection.find_one = AsyncMock(return_value={"_id": "id_789", "username": "cacheduser"})
+        
+        first = asyncio.run(get_user_by_username("cacheduser"))
+        second = asyncio.run(get_user_by_username("cacheduser"))
+        assert first == second
+        mock_collection.find_one.assert_awaited_once()
     
     @patch('services.db_service.users_collection')
     def test_get_user_by_username_not_exists(self, mock_collection):
         """Test retrieving a non-existent user"""
-        mock_collection.find_one.return_value = None
+        mock_collection.find_one = AsyncMock(return_value=None)
         
-        result = get_user_by_username("nonexistent")
+        result = asyncio.run(get_user_by_username("nonexistent"))
         assert result is None
     
     @patch('services.db_service.users_collection')
@@ -119,9 +153,9 @@ class TestDatabaseConnection:
         # Mock insert operation
         mock_result = MagicMock()
         mock_result.inserted_id = "new_user_id_456"
-        mock_collection.insert_one.return_value = mock_result
+        mock_collection.insert_one = AsyncMock(return_value=mock_result)
         
-        user_id = insert_user("newuser", "hashed_password_123", "user")
+        user_id = asyncio.run(insert_user("newuser", "hashed_password_123", "user"))
         assert user_id == "new_user_id_456"
         mock_collection.insert_one.assert_called_once()
 
@@ -177,6 +211,16 @@ class TestAuthenticationService:
         assert token is not None
         assert isinstance(token, str)
     
+    def test_decode_access_token(self):
+        """Test a created token decodes back to its claims"""
+        data = {"sub": "testuser", "role": "admin"}
+        token = create_access_token(data, expires_delta=timedelta(minutes=30))
+        
+        payload = decode_access_token(token)
+        assert payload["sub"] == "testuser"
+        assert payload["role"] == "admin"
+        assert "exp" in payload
+    
     @patch('services.auth_service.get_user')
     @patch('services.auth_service.verify_password')
     def test_authenticate_user_success(self, mock_verify, mock_get_user):
@@ -190,7 +234,7 @@ class TestAuthenticationService:
         mock_get_user.return_value = mock_user
         mock_verify.return_value = True
         
-        result = authenticate_user("testuser", "password123")
+        result = asyncio.run(authenticate_user("testuser", "password123"))
         assert result == mock_user
     
     @patch('services.auth_service.get_user')
@@ -198,7 +242,7 @@ class TestAuthenticationService:
         """Test authentication with non-existent user"""
         mock_get_user.return_value = None
         
-        result = authenticate_user("nonexistent", "password123")
+        result = asyncio.run(authenticate_user("nonexistent", "password123"))
         assert result is False
     
     @patch('services.auth_service.get_user')
@@ -214,9 +258,25 @@ class TestAuthenticationService:
         mock_get_user.return_value = mock_user
         mock_verify.return_value = False
         
-        result = authenticate_user("testuser", "wrongpassword")
+        result = asyncio.run(authenticate_user("testuser", "wrongpassword"))
         assert result is False
     
+    @patch('services.auth_service.update_password_hash')
+    @patch('services.auth_service.get_user')
+    def test_authenticate_user_upgrades_bcrypt_hash(self, mock_get_user, mock_update):
+        """Test a legacy bcrypt hash is re-hashed with argon2 on login"""
+        from passlib.hash import bcrypt
+        mock_get_user.return_value = {
+            "id": "123",
+            "username": "testuser",
+            "hashed_password": bcrypt.hash("password123"),
+            "role": "user"
+        }
+        
+        result = asyncio.run(authenticate_user("testuser", "password123"))
+        assert result["hashed_password"].startswith("$argon2")
+        mock_update.assert_called_once_with("testuser", result["hashed_password"])
+    
     def test_get_user_role(self):
         """Test extracting user role"""
         user_with_role = {"username": "test", "role": "admin"}
@@ -233,18 +293,18 @@ class TestAuthenticationService:
 class TestAPIEndpoints:
     """Test FastAPI endpoints"""
     
-    def test_home_endpoint(self):
+    def test_home_endpoint(self, client):
         """Test the home endpoint"""
         response = client.get("/app2/home")
         assert response.status_code == 200
         assert response.json() == {"message": "APP2 Home"}
     
-    def test_docs_endpoint_accessible(self):
+    def test_docs_endpoint_accessible(self, client):
         """Test that API documentation is accessible"""
         response = client.get("/app2/docs")
         assert response.status_code == 200
     
-    def test_openapi_schema_accessible(self):
+    def test_openapi_schema_accessible(self, client):
         """Test that OpenAPI schema is accessible"""
         response = client.get("/app2/openapi.json")
         assert response.status_code == 200
@@ -253,7 +313,7 @@ class TestAPIEndpoints:
     @patch('services.db_service.get_user_by_username')
     @patch('services.db_service.insert_user')
     @patch('routes.auth_route.get_password_hash')
-    def test_register_endpoint_success(self, mock_hash, mock_insert, mock_get_user):
+    def test_register_endpoint_success(self, mock_hash, mock_insert, mock_get_user, client):
         """Test user registration endpoint"""
         # Generate unique username to avoid conflicts
         unique_username = f"testuser_{uuid.uuid4().hex[:8]}"
@@ -275,7 +335,7 @@ class TestAPIEndpoints:
         assert response.json()["message"] == "User registered successfully"
     
     @patch('routes.auth_route.get_user_by_username')
-    def test_register_endpoint_user_exists(self, mock_get_user):
+    def test_register_endpoint_user_exists(self, mock_get_user, client):
         """Test registration with existing username"""
         mock_get_user.return_value = {"username": "existinguser"}
         
@@ -291,7 +351,7 @@ class TestAPIEndpoints:
         assert "already registered" in response.json()["detail"]
     
     @patch('routes.auth_route.authenticate_user')
-    def test_login_endpoint_success(self, mock_authenticate):
+    def test_login_endpoint_success(self, mock_authenticate, client):
         """Test login endpoint with valid credentials"""
         mock_authenticate.return_value = {
             "id": "123",
@@ -312,7 +372,7 @@ class TestAPIEndpoints:
         assert response.json()["token_type"] == "bearer"
     
     @patch('services.auth_service.authenticate_user')
-    def test_login_endpoint_invalid_credentials(self, mock_authenticate):
+    def test_login_endpoint_invalid_credentials(self, mock_authenticate, client):
         """Test login endpoint with invalid credentials"""
         mock_authenticate.return_value = False
         
@@ -334,9 +394,10 @@ class TestAPIEndpoints:
 class TestDockerService:
     """Test Docker service operations"""
     
-    @patch('services.docker_service.docker_client')
-    def test_docker_login_success(self, mock_docker):
+    @patch('services.docker_service.get_docker_client')
+    def test_docker_login_success(self, mock_get_client):
         """Test Docker Hub login"""
+        mock_docker = mock_get_client.return_value
         mock_docker.login.return_value = {"Status": "Login Succeeded"}
         
         from services.docker_service import docker_login
@@ -345,9 +406,10 @@ class TestDockerService:
         assert result["status"] == "success"
         assert "Logged in" in result["message"]
     
-    @patch('services.docker_service.docker_client')
-    def test_docker_login_failure(self, mock_docker):
+    @patch('services.docker_service.get_docker_client')
+    def test_docker_login_failure(self, mock_get_client):
         """Test Docker Hub login failure"""
+        mock_docker = mock_get_client.return_value
         from docker.errors import APIError
         mock_docker.login.side_effect = APIError("Login failed")
         
@@ -355,6 +417,388 @@ class TestDockerService:
         result = docker_login("testuser", "wrongpass")
         
         assert "error" in result
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_push_image_reuses_cached_login(self, mock_get_client):
+        """Test repeat pushes with the same credentials log in only once"""
+        mock_docker = mock_get_client.return_value
+        mock_docker.images.push.return_value = iter([{"status": "Pushed"}])
+        
+        from services.docker_service import push_image, _AUTH_CACHE
+        _AUTH_CACHE.clear()
+        push_image("app:latest", "user/app:latest", "user", "secret")
+        mock_docker.images.push.return_value = iter([{"status": "Pushed"}])
+        push_image("app:latest", "user/app:latest", "user", "secret")
+        
+        mock_docker.login.assert_called_once()
+        _, kwargs = mock_docker.images.push.call_args
+        assert kwargs["auth_config"] == {"username": "user", "password": "secret"}
+        _AUTH_CACHE.clear()
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_push_auth_only_sent_to_matching_registry(self, mock_get_client):
+        """Test cached Docker Hub credentials aren't sent to another registry or used for pulls"""
+        mock_docker = mock_get_client.return_value
+        mock_docker.images.push.return_value = iter([{"status": "Pushed"}])
+        
+        from services.docker_service import push_image, pull_image, _AUTH_CACHE
+        _AUTH_CACHE.clear()
+        push_image("app:latest", "evil.example.com/x:latest", "user", "secret")
+        pull_image("app:latest", "user/app")
+        
+        _, kwargs = mock_docker.images.push.call_args
+        assert kwargs["auth_config"] is None
+        mock_docker.images.pull.assert_called_once_with("user/app:latest")
+        _AUTH_CACHE.clear()
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_delete_image_not_found(self, mock_get_client):
+        """Test deleting a missing image in a single daemon call"""
+        mock_api = mock_get_client.return_value.api
+        from docker.errors import ImageNotFound
+        mock_api.remove_image.side_effect = ImageNotFound("No such image")
+        
+        from services.docker_service import delete_image
+        result = delete_image("missing:latest")
+        
+        assert result == {"error": "Image missing:latest not found"}
+        mock_api.remove_image.assert_called_once_with("missing:latest", force=True)
+    
+    def test_clone_existing_path_rejected(self, tmp_path):
+        """Test cloning into an existing directory is refused without touching it"""
+        (tmp_path / "repo").mkdir()
+        (tmp_path / "repo" / "keep.txt").write_text("data")
+        
+        from services.docker_service import clone_github_repo
+        with patch('services.docker_service._load_pygit2') as mock_load:
+            result = clone_github_repo("https://github.com/o/repo.git", "repo", str(tmp_path))
+        
+        assert result == {"error": f"Directory {tmp_path / 'repo'} already exists."}
+        assert (tmp_path / "repo" / "keep.txt").exists()
+        mock_load.assert_not_called()
+    
+    def test_clone_failure_removes_directory(self, tmp_path):
+        """Test a failed clone doesn't leave a directory behind"""
+        mock_pygit2 = MagicMock()
+        mock_pygit2.clone_repository.side_effect = Exception("network down")
+        
+        from services.docker_service import clone_github_repo
+        with patch('services.docker_service._load_pygit2', return_value=mock_pygit2):
+            result = clone_github_repo("https://github.com/o/repo.git", "repo", str(tmp_path / "work"))
+        
+        assert result == {"error": "Failed to clone repository: network down"}
+        assert not (tmp_path / "work" / "repo").exists()
+        mock_pygit2.clone_repository.assert_called_once_with(
+            "https://github.com/o/repo.git", str(tmp_path / "work" / "repo"), depth=1
+        )
+    
+    def test_clone_subprocess_failure_removes_directory(self, tmp_path):
+        """Test a failed git subprocess clone doesn't leave a directory behind"""
+        from services.docker_service import clone_github_repo
+        with patch('services.docker_service._load_pygit2', return_value=None), \
+             patch('services.docker_service.run_command', return_value={"error": "not found"}):
+            result = clone_github_repo("https://github.com/o/repo.git", "repo", str(tmp_path))
+        
+        assert result == {"error": "Failed to clone repository: not found"}
+        assert not (tmp_path / "repo").exists()
+    
+    def test_clone_flag_forces_subprocess(self, tmp_path):
+        """Test GIT_CLONE_SUBPROCESS uses a shallow git clone even when pygit2 is available"""
+        destination = str(tmp_path / "repo")
+        
+        from services.docker_service import clone_github_repo
+        with patch('services.docker_service.GIT_CLONE_SUBPROCESS', True), \
+             patch('services.docker_service._load_pygit2') as mock_load, \
+             patch('services.docker_service.run_command', return_value={"output": "done"}) as mock_run:
+            result = clone_github_repo("https://github.com/o/repo.git", "repo", str(tmp_path))
+        
+        assert result == {"message": f"Repository cloned to {destination}", "output": "done"}
+        mock_load.assert_not_called()
+        mock_run.assert_called_once_with([
+            "git", "clone", "--depth=1", "--single-branch", "--no-tags", "https://github.com/o/repo.git", destination
+        ])
+    
+    def test_app_import_skips_optional_sdks(self):
+        """Test importing the app loads neither docker, kubernetes nor pygit2"""
+        import subprocess
+        import sys
+        check = "import sys, main; print(sorted(m for m in ('docker', 'kubernetes', 'pygit2') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip().splitlines()[-1] == "[]"
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_list_volumes_raises_on_failure(self, mock_get_client):
+        """Test volume listing failures raise so the response cache can serve a stale entry"""
+        mock_get_client.return_value.volumes.list.side_effect = Exception("daemon down")
+        
+        from services.docker_service import list_volumes, _invalidate_listings
+        _invalidate_listings()
+        with pytest.raises(Exception, match="Failed to list volumes"):
+            list_volumes()
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_docker_ps_uses_low_level_api(self, mock_get_client):
+        """Test docker ps maps raw container dicts without model lookups"""
+        mock_api = mock_get_client.return_value.api
+        mock_api.containers.return_value = [{
+            "Id": "abc123",
+            "Names": ["/web"],
+            "State": "running",
+            "Image": "nginx:latest"
+        }]
+        
+        from services.docker_service import docker_ps
+        result = docker_ps()
+        
+        assert result == [{"id": "abc123", "name": "web", "status": "running", "image": ["nginx:latest"]}]
+
+
+# ============================================
+# Container Log Tests
+# ============================================
+
+class TestContainerLogs:
+    """Test container log streaming"""
+    
+    @patch('routes.container_route.ds.list_volumes', side_effect=Exception("Failed to list volumes: daemon down"))
+    @patch('routes.container_route.ds.docker_ps', return_value=[])
+    @patch('routes.container_route.ds.list_images', return_value=[])
+    def test_overview_reports_docker_errors(self, mock_images, mock_ps, mock_volumes, client):
+        """Test a failing listing in the overview comes back as a 500 with detail"""
+        from services.auth_service import get_current_user
+        app.dependency_overrides[get_current_user] = lambda: {"username": "testuser", "role": "user"}
+        try:
+            response = client.get("/app2/overview")
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 500
+        assert response.json()["detail"] == "Failed to list volumes: daemon down"
+    
+    def test_iter_file_tail(self, tmp_path):
+        """Test the log tail for empty, small and oversized files"""
+        from routes import container_route
+        log_path = tmp_path / "app.log"
+        
+        log_path.write_bytes(b"")
+        assert list(container_route.iter_file_tail(str(log_path), 8)) == []
+        
+        log_path.write_bytes(b"short")
+        assert b"".join(container_route.iter_file_tail(str(log_path), 8)) == b"short"
+        
+        log_path.write_bytes(b"0123456789abcdef")
+        with patch.object(container_route, 'LOG_CHUNK_SIZE', 3):
+            chunks = list(container_route.iter_file_tail(str(log_path), 8))
+        assert b"".join(chunks) == b"89abcdef"
+        assert all(len(chunk) <= 3 for chunk in chunks)
+        
+        assert b"".join(container_route.iter_file_tail(str(log_path), 16)) == b"0123456789abcdef"
+    
+    def test_iter_file_tail_fails_before_streaming(self, tmp_path):
+        """Test a missing log file raises when the tail is set up, not mid-stream"""
+        from routes import container_route
+        
+        with pytest.raises(FileNotFoundError):
+            container_route.iter_file_tail(str(tmp_path / "missing.log"), 8)
+    
+    @patch('routes.container_route.ds.get_logs')
+    def test_logs_query_passthrough(self, mock_get_logs, client):
+        """Test tail, since and follow reach the Docker log call"""
+        from services.auth_service import get_current_user
+        mock_get_logs.return_value = iter([b"line one\n", b"line two\n"])
+        app.dependency_overrides[get_current_user] = lambda: {"username": "testuser", "role": "user"}
+        try:
+            response = client.get("/app2/logs/web", params={"tail": 50, "since": 1700000000, "follow": "true"})
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 200
+        assert response.text == "line one\nline two\n"
+        mock_get_logs.assert_called_once_with("web", 50, 1700000000, True)
+    
+    @patch('services.docker_service.get_docker_client')
+    def test_get_logs_streams_with_options(self, mock_get_client):
+        """Test get_logs asks Docker for a bounded stream"""
+        container = mock_get_client.return_value.containers.get.return_value
+        
+        from services.docker_service import get_logs
+        get_logs("web", tail=50, since=1700000000, follow=True)
+        
+        container.logs.assert_called_once_with(stream=True, follow=True, timestamps=True, tail=50, since=1700000000)
+    
+    def test_stream_closed_on_disconnect(self):
+        """Test an idle followed stream is closed once the client disconnects"""
+        import threading
+        from routes import container_route
+        
+        # Blocks like an idle followed container until close() is called
+        class IdleStream:
+            def __init__(self):
+                self.closed = threading.Event()
+            def __iter__(self):
+                return self
+            def __next__(self):
+                self.closed.wait()
+                raise StopIteration
+            def close(self):
+                self.closed.set()
+        
+        log_stream = IdleStream()
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=True)
+        
+        async def run():
+            return [chunk async for chunk in container_route.stream_container_logs(request, log_stream)]
+        
+        with patch.object(container_route, 'LOG_DISCONNECT_POLL', 0.01), \
+             patch.object(container_route, '_open_log_streams', 1):
+            assert asyncio.run(run()) == []
+            assert container_route._open_log_streams == 0
+        assert log_stream.closed.is_set()
+    
+    @patch('routes.container_route.ds.get_logs')
+    def test_logs_rejected_over_stream_limit(self, mock_get_logs, client):
+        """Test new log streams get a 503 once the stream limit is reached"""
+        from routes import container_route
+        from services.auth_service import get_current_user
+        app.dependency_overrides[get_current_user] = lambda: {"username": "testuser", "role": "user"}
+        try:
+            with patch.object(container_route, '_open_log_streams', container_route.LOG_STREAM_LIMIT):
+                response = client.get("/app2/logs/web", params={"follow": "true"})
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert response.status_code == 503
+        mock_get_logs.assert_not_called()
+
+
+# ============================================
+# Response Cache Tests
+# ============================================
+
+@pytest.fixture
+def fake_redis():
+    """Point both response cache clients at one in-memory Redis"""
+    import fakeredis
+    server = fakeredis.FakeServer()
+    with patch('services.cache_service.redis_client', fakeredis.FakeAsyncRedis(server=server)), \
+         patch('services.cache_service.sync_redis_client', fakeredis.FakeRedis(server=server)), \
+         patch('services.cache_service._cache_down_until', 0.0):
+        yield server
+
+
+def make_cached_handler(results, ttl=10, tag=None):
+    """Build a cache_policy handler that returns the next item from results on each real call"""
+    from services.cache_service import cache_policy
+    calls = iter(results)
+
+    @cache_policy(ttl=ttl, tag=tag)
+    async def handler(request, current_user):
+        result = next(calls)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    request = MagicMock()
+    request.url.path = "/app2/ps"
+    request.url.query = ""
+    return handler, {"request": request, "current_user": {"username": "testuser", "role": "user"}}
+
+
+class TestResponseCache:
+    """Test the Redis response cache"""
+    
+    def test_cache_hit_skips_handler(self, fake_redis):
+        """Test a fresh entry is served without calling the handler again"""
+        handler, kwargs = make_cached_handler([["first"], ["second"]])
+        
+        async def run():
+            return await handler(**kwargs), await handler(**kwargs)
+        
+        assert asyncio.run(run()) == (["first"], ["first"])
+    
+    def test_cache_miss_per_role(self, fake_redis):
+        """Test entries are keyed by role as well as path"""
+        handler, kwargs = make_cached_handler([["user view"], ["admin view"]])
+        admin_kwargs = {**kwargs, "current_user": {"username": "root", "role": "admin"}}
+        
+        async def run():
+            return await handler(**kwargs), await handler(**admin_kwargs)
+        
+        assert asyncio.run(run()) == (["user view"], ["admin view"])
+    
+    def test_stale_entry_served_on_failure(self, fake_redis):
+        """Test a stale entry is served when the handler fails"""
+        handler, kwargs = make_cached_handler([["good"], Exception("daemon down")], ttl=0)
+        
+        async def run():
+            return await handler(**kwargs), await handler(**kwargs)
+        
+        assert asyncio.run(run()) == (["good"], ["good"])
+    
+    def test_failure_without_entry_raises(self, fake_redis):
+        """Test a handler failure propagates when nothing is cached"""
+        handler, kwargs = make_cached_handler([Exception("daemon down")])
+        
+        with pytest.raises(Exception, match="daemon down"):
+            asyncio.run(handler(**kwargs))
+    
+    def test_error_body_not_cached(self, fake_redis):
+        """Test an error body doesn't replace the cached response"""
+        handler, kwargs = make_cached_handler([{"error": "daemon down"}, ["recovered"]])
+        
+        async def run():
+            return await handler(**kwargs), await handler(**kwargs)
+        
+        assert asyncio.run(run()) == ({"error": "daemon down"}, ["recovered"])
+    
+    def test_redis_down_calls_handler(self, fake_redis):
+        """Test requests still succeed when Redis is unreachable"""
+        fake_redis.connected = False
+        handler, kwargs = make_cached_handler([["first"], ["second"]])
+        
+        async def run():
+            return await handler(**kwargs), await handler(**kwargs)
+        
+        with patch('services.cache_service.logger') as mock_logger:
+            assert asyncio.run(run()) == (["first"], ["second"])
+        # One warning per outage, not one per request
+        assert mock_logger.warning.call_count == 1
+    
+    def test_invalidate_tag_drops_cached_responses(self, fake_redis):
+        """Test invalidating a tag makes the next read hit the handler"""
+        from services.cache_service import invalidate_tag
+        handler, kwargs = make_cached_handler([[], [{"name": "web"}]], tag="docker_listings")
+        
+        async def run():
+            first = await handler(**kwargs)
+            cached = await handler(**kwargs)
+            await asyncio.to_thread(invalidate_tag, "docker_listings")
+            fresh = await handler(**kwargs)
+            return first, cached, fresh
+        
+        first, cached, fresh = asyncio.run(run())
+        assert first == [] and cached == []
+        assert fresh == [{"name": "web"}]
+    
+    def test_listing_invalidation_clears_response_cache(self, no_response_cache_invalidation):
+        """Test docker writes also drop the cached listing responses"""
+        from services.docker_service import _invalidate_listings, LISTINGS_CACHE_TAG
+        _invalidate_listings()
+        no_response_cache_invalidation.assert_called_once_with(LISTINGS_CACHE_TAG)
+    
+    def test_invalidation_skipped_while_redis_down(self, fake_redis):
+        """Test invalidations don't retry Redis during an outage"""
+        from services.cache_service import invalidate_tag
+        fake_redis.connected = False
+        
+        with patch('services.cache_service.logger') as mock_logger:
+            invalidate_tag("docker_listings")
+            invalidate_tag("docker_listings")
+        assert mock_logger.warning.call_count == 1
 
 
 # ============================================
@@ -368,7 +812,7 @@ class TestIntegration:
     @patch('routes.auth_route.insert_user')
     @patch('routes.auth_route.get_password_hash')
     @patch('routes.auth_route.authenticate_user')
-    def test_register_and_login_flow(self, mock_auth, mock_hash, mock_insert, mock_get_user):
+    def test_register_and_login_flow(self, mock_auth, mock_hash, mock_insert, mock_get_user, client):
         """Test complete registration and login flow"""
         # Generate unique username to avoid conflicts
         unique_username = f"integration_{uuid.uuid4().hex[:8]}"